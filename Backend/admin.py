@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request, flash, jsonify
-from werkzeug.security import check_password_hash, generate_password_hash
-from .db_adapter import get_db_connection
+from flask import Blueprint, render_template, session, redirect, url_for, request, flash, jsonify, current_app, stream_template
+from .db_adapter import dialect_sql, get_db_connection, get_tuple_cursor
+from .tools.auth_utils import hash_password, check_password
 from flask import g
+from collections import OrderedDict
+import hmac
 import os
+import threading
 import time
+import traceback
 
 # DoS detection tools (detector removed)
 # DoSDetector removed — keep analyzer/mitigator for other admin capabilities
@@ -19,26 +23,62 @@ mitigator = Mitigator()
 
 """Admin authentication configuration.
 
-You should set ADMIN_PASSWORD as a hashed value (output of generate_password_hash).
+You should set ADMIN_PASSWORD as a hashed value (an Argon2 hash from
+tools.auth_utils.hash_password, or a legacy Werkzeug hash).
 For convenience, if ADMIN_PASSWORD looks like plaintext (no known hash scheme
-prefix), we'll hash it at startup. Default is a strong hash for 'admin123'.
+prefix), we'll hash it with Argon2id at startup. Default is an Argon2id hash
+for 'admin123'.
 """
 
-_DEFAULT_HASH = (
-    'scrypt:32768:8:1$xgInVDOssyMWNUsh$161cba3e03e41893ab4c85979d6d146d599a793972152731e'
-    'ed1b28108a08553429604eb00e6c979914b0d211198ef75d774924d298e2d156c754d69345b9e90'
-)
+_DEFAULT_HASH = '$argon2id$v=19$m=65536,t=2,p=2$mvSn3V7orWfg7kv2vMBMow$oQZ97kK217hJh0fnlWi7y/IdEoXItg5Z2dcTKYKmSJE'
+
+# Scheme prefixes of values that are already hashes
+_HASH_PREFIXES = ('$argon2', 'pbkdf2:', 'scrypt:', 'argon2:', 'sha256:', 'sha1:')
 
 _env_val = os.getenv('ADMIN_PASSWORD')
 if not _env_val:
     ADMIN_PASSWORD_HASH = _DEFAULT_HASH
 else:
-    # If it already looks like a Werkzeug hash (has a scheme prefix like pbkdf2: or scrypt:), use as-is
-    if any(_env_val.startswith(prefix) for prefix in ('pbkdf2:', 'scrypt:', 'argon2:', 'sha256:', 'sha1:')):
+    # If it already looks like an Argon2 or Werkzeug hash (scheme prefix like $argon2 or scrypt:), use as-is
+    if _env_val.startswith(_HASH_PREFIXES):
         ADMIN_PASSWORD_HASH = _env_val
     else:
-        # Treat as plaintext and hash it so check_password_hash works
-        ADMIN_PASSWORD_HASH = generate_password_hash(_env_val)
+        # Treat as plaintext and hash it with Argon2id
+        ADMIN_PASSWORD_HASH = hash_password(_env_val)
+
+# Short-lived cache of admin password checks so repeated submissions don't pay
+# the full KDF cost each time. Keys are HMAC(secret_key, password) digests, so
+# plaintext passwords are never held in memory.
+_VERIFY_CACHE_SIZE = 128
+_VERIFY_CACHE_TTL = 60  # seconds
+_verify_cache: "OrderedDict[bytes, tuple]" = OrderedDict()  # {digest: (checked_at, ok)}
+_verify_lock = threading.Lock()
+
+
+def _check_admin_password(password: str) -> bool:
+    """Verify the admin password, reusing a recent result when available."""
+    password = password or ''
+    secret = current_app.secret_key or ''
+    if isinstance(secret, str):
+        secret = secret.encode()
+    digest = hmac.new(secret, password.encode(), 'sha256').digest()
+    now = time.monotonic()
+
+    with _verify_lock:
+        cached = _verify_cache.get(digest)
+        if cached and now - cached[0] < _VERIFY_CACHE_TTL:
+            _verify_cache.move_to_end(digest)
+            return cached[1]
+
+    # Argon2, or a legacy Werkzeug hash (pbkdf2/scrypt) supplied via ADMIN_PASSWORD
+    ok = check_password(ADMIN_PASSWORD_HASH, password)
+
+    with _verify_lock:
+        _verify_cache[digest] = (now, ok)
+        _verify_cache.move_to_end(digest)
+        while len(_verify_cache) > _VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+    return ok
 
 @admin_bp.route('/login', methods=['GET', 'POST'])
 def admin_login():
@@ -47,7 +87,7 @@ def admin_login():
         password = request.form.get('password')
         
         # Check password securely
-        if check_password_hash(ADMIN_PASSWORD_HASH, password):
+        if _check_admin_password(password):
             session['admin_authenticated'] = True
             flash('Admin login successful', 'success')
             return redirect(url_for('admin.view_users'))
@@ -63,6 +103,10 @@ def admin_logout():
     flash('Logged out successfully', 'success')
     return redirect(url_for('index'))
 
+# Rows per page on the users view, and the cap on debug_db's user list
+_USERS_PER_PAGE = 50
+_DEBUG_USERS_LIMIT = 100
+
 @admin_bp.route('/users')
 def view_users():
     """View all registered users (admin only)."""
@@ -71,11 +115,25 @@ def view_users():
         flash('Please login as admin first', 'error')
         return redirect(url_for('admin.admin_login'))
     
+    page = request.args.get('page', 1, type=int)
+    page = max(page or 1, 1)
+
     conn = get_db_connection()
-    
+    total_users = passwords_set = 0
+    users = iter(())
+
     try:
         # Safe SQL query - no user input involved, protected against SQL injection
-        cursor = conn.cursor()
+        cursor = get_tuple_cursor(conn)
+        # Summary counts come from SQL so the row list never has to be materialized
+        cursor.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN COALESCE(a.password_hash, u.password_hash) IS NOT NULL THEN 1 ELSE 0 END), 0)
+            FROM users u
+            LEFT JOIN auth a ON u.id = a.user_id
+        ''')
+        total_users, passwords_set = cursor.fetchone()
+
         # Left join auth to avoid exposing password hashes directly; we only mark whether a password is set
         cursor.execute('''
             SELECT u.id, COALESCE(u.username, ''), u.email, u.mobile, u.registered_at,
@@ -85,26 +143,47 @@ def view_users():
             FROM users u
             LEFT JOIN auth a ON u.id = a.user_id
             ORDER BY u.registered_at DESC
-        ''')
-        users = cursor.fetchall()
+        ''' + dialect_sql('SQL_LIMIT_OFFSET'), (_USERS_PER_PAGE, (page - 1) * _USERS_PER_PAGE))
+        # Rows are pulled from the cursor as the template renders them
+        users = iter(cursor)
 
-        # Debug logging
-        print(f"[ADMIN DEBUG] Found {len(users)} users in database")
-        # Do not log password_hash or other sensitive fields
-        for user in users:
-            print(f"[ADMIN DEBUG] User id={user[0]}, email={user[2]}")
+        # Debug logging (lazy formatting; skipped unless DEBUG is enabled)
+        current_app.logger.debug('admin.view_users count=%d', total_users)
 
     except Exception as e:
         print(f"[ADMIN ERROR] Failed to fetch users: {e}")
-        users = []
-    finally:
-        conn.close()
 
-    # Compute summary counts without exposing sensitive data
-    total_users = len(users)
-    passwords_set = sum(1 for u in users if u[5])
+    # Stream the page so the first bytes go out before the last row is read;
+    # the request context (and DB connection) stays open until it finishes.
+    return current_app.response_class(
+        stream_template(
+            'admin/users.html',
+            users=users,
+            total_users=total_users,
+            passwords_set=passwords_set,
+            page=page,
+            has_next=page * _USERS_PER_PAGE < total_users,
+        ),
+        mimetype='text/html',
+    )
+
+# Column positions in the debug_db user query
+_ID, _EMAIL, _MOBILE, _REGISTERED_AT = 0, 1, 2, 3
+
+# Table names per backend. The schema is created at startup and does not
+# change while the process runs, so each catalog is only queried once.
+_table_names = {}
+
+
+def _list_tables(cursor):
+    """Return the table names for the request's backend, cached per process."""
+    db_type = g.get('db_type', 'sqlite')
+    names = _table_names.get(db_type)
+    if names is None:
+        cursor.execute(dialect_sql('SQL_LIST_TABLES'))
+        names = _table_names[db_type] = [t[0] for t in cursor.fetchall()]
+    return names
 
-    return render_template('admin/users.html', users=users, total_users=total_users, passwords_set=passwords_set)
 
 @admin_bp.route('/debug-db')
 def debug_db():
@@ -121,48 +200,45 @@ def debug_db():
         database_url = os.getenv('DATABASE_URL')
         mysql_host = os.getenv('MYSQL_HOST')
         
-        # Get all tables
-        cursor = conn.cursor()
-        if db_type == "postgres":
-            cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname='public'")
-        elif db_type == "mysql":
-            cursor.execute("SHOW TABLES")
-        else:  # sqlite
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        
-        # Get all users
-        cursor.execute('SELECT id, email, mobile, registered_at FROM users ORDER BY registered_at DESC')
+        cursor = get_tuple_cursor(conn)
+        tables = _list_tables(cursor)
+
+        # Get the newest users (capped; user_count below has the full total)
+        cursor.execute(
+            'SELECT id, email, mobile, registered_at FROM users ORDER BY registered_at DESC'
+            + dialect_sql('SQL_LIMIT_OFFSET'),
+            (_DEBUG_USERS_LIMIT, 0),
+        )
         users = cursor.fetchall()
-        
+
         # Get user count
         cursor.execute('SELECT COUNT(*) FROM users')
-        user_count = cursor.fetchone()[0] if cursor.fetchone() else 0
-        cursor.execute('SELECT COUNT(*) FROM users')
-        user_count = cursor.fetchone()[0]
+        row = cursor.fetchone()
+        user_count = row[0] if row else 0
         
         return jsonify({
             'database_type': db_type.upper(),
             'database_url_set': bool(database_url),
             'mysql_host_set': bool(mysql_host),
-            'tables': [t[0] for t in tables],
+            'tables': tables,
             'user_count': user_count,
             'users': [
                 {
-                    'id': u[0] if not isinstance(u, dict) else u.get('id'),
-                    'email': u[1] if not isinstance(u, dict) else u.get('email'),
-                    'mobile': u[2] if not isinstance(u, dict) else u.get('mobile'),
-                    'registered_at': str(u[3]) if not isinstance(u, dict) else str(u.get('registered_at'))
+                    'id': u[_ID],
+                    'email': u[_EMAIL],
+                    'mobile': u[_MOBILE],
+                    'registered_at': str(u[_REGISTERED_AT])
                 }
                 for u in users
             ],
             'warning': 'SQLite data is temporary on Render free tier!' if db_type == 'sqlite' else None
         })
     except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
-    finally:
-        conn.close()
+        payload = {'error': str(e)}
+        # Tracebacks expose internals; only include them in debug mode
+        if current_app.debug:
+            payload['traceback'] = traceback.format_exc()
+        return jsonify(payload), 500
 
 
 @admin_bp.route('/dashboard')
@@ -185,27 +261,23 @@ def api_db_stats():
     db_type = g.get('db_type', 'sqlite')
     
     try:
-        cursor = conn.cursor()
-        
-        # Get user count
-        cursor.execute('SELECT COUNT(*) FROM users')
-        user_count = cursor.fetchone()[0]
+        cursor = get_tuple_cursor(conn)
         
-        # Get tool logs count
+        # User totals in one round-trip
+        cursor.execute(dialect_sql('SQL_USER_TOTALS'))
+        row = cursor.fetchone()
+        user_count = row[0]
+        recent_users = row[1] or 0
+
+        # Tool log totals (table may be missing on some backends)
         try:
-            cursor.execute('SELECT COUNT(*) FROM tool_logs')
-            log_count = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*), MIN(created_at) FROM tool_logs')
+            row = cursor.fetchone()
+            log_count = row[0]
+            oldest_log_str = str(row[1]) if row[1] else None
         except:
             log_count = 0
-        
-        # Get recent registrations (last 7 days)
-        if db_type == 'postgres':
-            cursor.execute("SELECT COUNT(*) FROM users WHERE registered_at > NOW() - INTERVAL '7 days'")
-        elif db_type == 'mysql':
-            cursor.execute("SELECT COUNT(*) FROM users WHERE registered_at > DATE_SUB(NOW(), INTERVAL 7 DAY)")
-        else:
-            cursor.execute("SELECT COUNT(*) FROM users WHERE registered_at > datetime('now', '-7 days')")
-        recent_users = cursor.fetchone()[0]
+            oldest_log_str = None
         
         # Estimate database size
         avg_user_size = 300  # bytes
@@ -217,14 +289,6 @@ def api_db_stats():
         storage_limit_mb = 800
         storage_percentage = (estimated_size_mb / storage_limit_mb) * 100
         
-        # Get oldest log date
-        try:
-            cursor.execute('SELECT MIN(created_at) FROM tool_logs')
-            oldest_log = cursor.fetchone()[0]
-            oldest_log_str = str(oldest_log) if oldest_log else None
-        except:
-            oldest_log_str = None
-        
         return jsonify({
             'ok': True,
             'db_type': db_type.upper(),
@@ -239,8 +303,25 @@ def api_db_stats():
         })
     except Exception as e:
         return jsonify({'ok': False, 'error': str(e)}), 500
-    finally:
-        conn.close()
+
+
+# Dashboards poll /api/incidents; reuse a snapshot for up to this many seconds
+# instead of rescanning every tracked IP on each poll.
+_INCIDENTS_TTL = 1.0
+_incidents_cache = {'at': 0.0, 'payload': None}
+
+
+def _collect_incidents():
+    """Snapshot analyzer/mitigator state for the incidents endpoint."""
+    # get_anomalies walks the tracked IPs once for floods and z-scores
+    anomalies = analyzer.get_anomalies()
+    return {
+        'global_spike': anomalies['global_spike'],
+        'high_traffic_ips': anomalies['per_ip_flood'],
+        'anomalous_ips': anomalies['z_score_alert'],
+        'blocked_ips': list(mitigator.blocked_ips.keys()),
+        'timestamp': anomalies['timestamp']
+    }
 
 
 @admin_bp.route('/api/incidents', methods=['GET'])
@@ -251,17 +332,12 @@ def get_incidents():
 
     # Collect analyzer/mitigator state
     try:
-        global_spike = analyzer.detect_global_spike()
-        high_rate_ips = analyzer.detect_per_ip_flood()
-        z_alerts = [ip for ip in analyzer.ip_requests if analyzer.calculate_z_score(ip) > 3]
-        blocked = list(mitigator.blocked_ips.keys())
-
-        return jsonify({
-            'global_spike': global_spike,
-            'high_traffic_ips': high_rate_ips,
-            'anomalous_ips': z_alerts,
-            'blocked_ips': blocked,
-            'timestamp': time.time()
-        })
+        now = time.monotonic()
+        payload = _incidents_cache['payload']
+        if payload is None or now - _incidents_cache['at'] >= _INCIDENTS_TTL:
+            payload = _collect_incidents()
+            _incidents_cache['payload'] = payload
+            _incidents_cache['at'] = now
+        return jsonify(payload)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,8 +1,4 @@
-from flask import Blueprint, request, jsonify
-import threading
-from functools import wraps
-import time
-from collections import deque
+from flask import Blueprint, jsonify
 
 api_bp = Blueprint('api', __name__)
 
@@ -1,29 +1,197 @@
+import hashlib
+import hmac
+import importlib
+import json
 import os
-from flask import Flask, jsonify, render_template, request, send_from_directory, redirect, url_for, session
-from werkzeug.security import check_password_hash, generate_password_hash
+import time
+from functools import lru_cache
+from flask import Flask, g, jsonify, render_template, request, send_from_directory, redirect, url_for, session
+from flask.json.provider import DefaultJSONProvider  # Flask 2.2+, pinned in requirements.txt
 
 from .config import Config, PROJECT_ROOT
-from .database import get_db, close_db, init_db
-from .db_adapter import init_database, close_db_connection, get_user_by_id, get_user_by_email, update_user_password, update_user_entitlements
+from .database import close_db, init_db, enqueue_tool_log, start_log_writer
+from .db_adapter import init_database, close_db_connection, get_user_by_id, get_user_full_by_id, update_user_password, update_user_entitlements
 from .auth import bp as auth_bp
 from .admin import admin_bp
-from .tools.email_analyzer import analyze_email_tool
-from .tools.url_scanner import scan_url_tool
-from .tools.password_cracker import crack_hash_tool
-from .tools.sms_spam_detector import test_sms_tool
-from .tools.malware_analyzer import analyze_file_tool
-from .tools.web_recon import recon_target_tool
-from .tools.stegoshield_inspector import analyze_stegoshield_tool
-from .tools.stegoshield_extractor import analyze_stegoshield_extractor
-import time
-from collections import deque
-from functools import wraps
-import threading
+from .tools.auth_utils import hash_password, check_password
+
+try:
+    import orjson  # optional; faster JSON for responses, request bodies and tool logs
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    from flask_compress import Compress  # optional; gzip/brotli for JSON and HTML
+except Exception:  # pragma: no cover - optional dependency
+    Compress = None
+
+try:
+    from whitenoise import WhiteNoise  # optional; serves /assets without hitting Flask
+except Exception:  # pragma: no cover - optional dependency
+    WhiteNoise = None
+
+# CSS/JS/images referenced by the static pages, served at /assets
+_ASSETS_DIR = os.path.join(PROJECT_ROOT, 'assets')
+
+# Browser cache lifetime for /assets. Filenames aren't content-hashed, so keep
+# this to a week rather than the usual one-year immutable policy.
+_ASSET_MAX_AGE = 7 * 24 * 3600
+# Public HTML pages change with deploys, so browsers recheck them hourly
+_PAGE_MAX_AGE = 3600
+# Window in which a browser may use a stale copy while it revalidates
+_STALE_WHILE_REVALIDATE = 24 * 3600
+
+# /api/user-session reply for anonymous visitors, which the frontend polls
+_ANON_SESSION_BODY = b'{"logged_in":false}\n'
+_ANON_SESSION_MAX_AGE = 30
+# Seconds a session-cached premium decision is trusted before the user row is
+# re-read, so revoked entitlements (or a replayed cookie) stop working quickly
+_ENTITLEMENT_TTL = 60
+
+# JSON request bodies larger than this are logged as a size only. Uploaded
+# files (multipart) are never logged; only their form fields are.
+_MAX_LOGGED_INPUT = 1_000_000
+
+
+class _OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (jsonify and request.get_json).
+
+    Keeps Flask's output conventions: sorted keys, dates via Flask's default
+    (HTTP date format), and indented output in debug mode, which is left to
+    the stdlib provider. Anything orjson can't encode falls back too.
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+@lru_cache(maxsize=4096)
+def _parse_allowed_tools(raw):
+    """Parse a user's allowed_tools column (JSON list or CSV) into a frozenset.
+
+    Cached on the raw string, so repeat premium-page loads skip the parse.
+    """
+    try:
+        tools = json.loads(raw) if raw and raw.strip().startswith('[') else [t.strip() for t in raw.split(',') if t.strip()]
+    except Exception:
+        tools = [t.strip() for t in raw.split(',') if t.strip()]
+    return frozenset(tools)
+
+
+def _send_static(directory, filename, max_age):
+    """send_from_directory with browser caching.
+
+    Werkzeug already sets a strong ETag (mtime-size-adler32 of the path) and
+    Last-Modified and turns matching conditional requests into 304s; this adds
+    the freshness lifetime. ``max_age=None`` marks the response no-cache so it
+    is revalidated on every use.
+    """
+    resp = send_from_directory(directory, filename, max_age=max_age)
+    _set_cache_headers(resp, max_age)
+    return resp
+
+
+def _set_cache_headers(resp, max_age):
+    if max_age:
+        resp.cache_control.public = True
+        resp.cache_control.max_age = max_age
+        resp.headers['Cache-Control'] += f', stale-while-revalidate={_STALE_WHILE_REVALIDATE}'
+    else:
+        resp.cache_control.no_cache = True
+
+
+def _read_page(filename, *directories):
+    """Return (bytes, etag) for the first directory holding filename, else False."""
+    for directory in directories:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                body = f.read()
+            return body, hashlib.sha1(body).hexdigest()
+    return False
+
+
+# Tool endpoints and the functions implementing them. Tool modules are imported
+# on first use so workers don't load PIL/reportlab/requests at startup.
+_TOOL_FUNCS = {
+    'email-analyzer': ('.tools.email_analyzer', 'analyze_email_tool'),
+    'url-scanner': ('.tools.url_scanner', 'scan_url_tool'),
+    'password-cracker': ('.tools.password_cracker', 'crack_hash_tool'),
+    'sms-spam-tester': ('.tools.sms_spam_detector', 'test_sms_tool'),
+    'malware-analyzer': ('.tools.malware_analyzer', 'analyze_file_tool'),
+    'web-recon': ('.tools.web_recon', 'recon_target_tool'),
+    'stegoshield-inspector': ('.tools.stegoshield_inspector', 'analyze_stegoshield_tool'),
+    'stegoshield-extractor': ('.tools.stegoshield_extractor', 'analyze_stegoshield_extractor'),
+}
+
+
+# Static tool pages exposed at /<filename>; each gets its own URL rule
+_ALLOWED_STATIC_PAGES = frozenset({
+    'tool1-email-analyzer.html',
+    'tool2-url-scanner.html',
+    'tool3-password-cracker.html',
+    'tool4-sms-spam-tester.html',
+    'tool5-malware-analyzer.html',
+    'tool6-web-recon.html',
+    'tool7-stegoshield-inspector.html',
+    'tool8-stegoshield-extractor.html',
+    #'tool9-dos-detector.html',
+    #'tool-web-vuln-scanner.html',
+    'directory.html',
+    'profile.html',
+    'settings.html',
+})
+
+# Premium/restricted pages (filenames) - can be overridden via env var PREMIUM_PAGES
+PREMIUM_PAGES = frozenset(
+    {p.strip() for p in os.getenv('PREMIUM_PAGES', '').split(',') if p.strip()}
+    or {'tool7-stegoshield-inspector.html', 'tool8-stegoshield-extractor.html'}
+)
+
+# Coupon redemption settings, read once at import
+_COUPON_CODE = os.getenv('COUPON_CODE', '').encode()
+_COUPON_GRANT_PREMIUM = os.getenv('COUPON_GRANT_PREMIUM', 'false').lower() in ('1', 'true', 'yes')
+_COUPON_TOOLS = tuple(t.strip() for t in os.getenv('PREMIUM_ALLOWED_TOOLS', '').split(',') if t.strip())
+
+
+@lru_cache(maxsize=None)
+def _get_tool(name):
+    """Import and return the function backing a tool endpoint."""
+    module_name, func_name = _TOOL_FUNCS[name]
+    return getattr(importlib.import_module(module_name, __package__), func_name)
 
 
 def create_app():
     app = Flask(__name__, template_folder=os.path.join(os.path.dirname(__file__), 'templates'))
     app.config.from_object(Config)
+    if orjson is not None:
+        app.json = _OrjsonProvider(app)
 
     # Note: DoS detector removed from this deployment. detection fields kept for compatibility.
     app.detector = None
@@ -42,6 +210,9 @@ def create_app():
         except Exception as e:
             app.logger.warning(f"Database init skipped or failed: {e}")
 
+    # Background writer for tool_logs rows
+    start_log_writer(app)
+
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
@@ -59,94 +230,111 @@ def create_app():
 
     # Compute canonical frontend/static directories
     FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
-    # Premium/restricted pages (filenames) - can be overridden via env var PREMIUM_PAGES
-    _DEFAULT_PREMIUM_PAGES = {
-        'tool7-stegoshield-inspector.html',
-        'tool8-stegoshield-extractor.html',
-    }
-    _env_premium_pages = os.getenv('PREMIUM_PAGES', '')
-    PREMIUM_PAGES = set([p.strip() for p in _env_premium_pages.split(',') if p.strip()]) or _DEFAULT_PREMIUM_PAGES
-
-    # Serve the styled static homepage by default
+
+    # Serve the styled static homepage by default, and at /index.html too
+    # (links may reference it). '/' is registered first so url_for('index')
+    # still builds '/'.
+    @app.route('/index.html')
     @app.route('/')
     def index():
         # Serve the static index.html from frontend folder
-        return send_from_directory(FRONTEND_DIR, 'index.html')
-
-    # Also serve /index.html explicitly (links may reference it)
-    @app.route('/index.html')
-    def static_index_file():
-        return send_from_directory(FRONTEND_DIR, 'index.html')
+        return _send_static(FRONTEND_DIR, 'index.html', _PAGE_MAX_AGE)
 
-    # Serve assets used by the static pages (e.g., assets/css/main.css)
+    # Serve assets used by the static pages (e.g., assets/css/main.css).
+    # With WhiteNoise installed, or nginx in front (BEHIND_NGINX), these
+    # requests never get here and this route is only the fallback.
     @app.route('/assets/<path:filename>')
     def static_assets(filename):
-        assets_dir = os.path.join(PROJECT_ROOT, 'assets')
-        return send_from_directory(assets_dir, filename)
-
-    # Expose the static tool pages for convenience
-    _ALLOWED_STATIC_PAGES = {
-        'tool1-email-analyzer.html',
-        'tool2-url-scanner.html',
-        'tool3-password-cracker.html',
-        'tool4-sms-spam-tester.html',
-        'tool5-malware-analyzer.html',
-        'tool6-web-recon.html',
-        'tool7-stegoshield-inspector.html',
-        'tool8-stegoshield-extractor.html',
-    #'tool9-dos-detector.html',
-    #'tool-web-vuln-scanner.html',
-        'directory.html',
-        'profile.html',
-        'settings.html',
-    }
+        return _send_static(_ASSETS_DIR, filename, _ASSET_MAX_AGE)
+
+    # Page bytes are read once and served from memory; the pages are small and
+    # only change on deploy (debug mode rereads them so edits show up).
+    _page_cache = {}
+
+    def _load_page(filename):
+        page = _page_cache.get(filename)
+        if page is None or app.debug:
+            # Prefer files under frontend/, but fall back to project root for legacy pages
+            page = _read_page(filename, FRONTEND_DIR, PROJECT_ROOT)
+            _page_cache[filename] = page
+        return page
+
+    def serve_static_page(filename):
+        max_age = _PAGE_MAX_AGE
+        # Enforce premium access for restricted pages
+        if filename in PREMIUM_PAGES:
+            # Never cached fresh, so access is rechecked on every load
+            # (the ETag still turns unchanged pages into a 304)
+            max_age = None
+            # Require login
+            user_id = session.get('user_id')
+            if not user_id:
+                return redirect(url_for('auth.login'))
+            if not _user_can_access(filename):
+                return redirect('/')
+        page = _load_page(filename)
+        if page is False:
+            return redirect('/')
+        body, etag = page
+        resp = app.response_class(body, mimetype='text/html')
+        resp.set_etag(etag)
+        _set_cache_headers(resp, max_age)
+        return resp.make_conditional(request)
+
+    # One exact rule per page, so known pages are matched directly instead
+    # of through the catch-all below
+    for _page in _ALLOWED_STATIC_PAGES:
+        app.add_url_rule(f'/{_page}', endpoint='static_page', view_func=serve_static_page,
+                         defaults={'filename': _page})
 
     @app.route('/<path:filename>')
     def serve_static_pages(filename):
-        from werkzeug.exceptions import NotFound
-        if filename in _ALLOWED_STATIC_PAGES:
-            # Enforce premium access for restricted pages
-            if filename in PREMIUM_PAGES:
-                # Require login
-                user_id = session.get('user_id')
-                if not user_id:
-                    return redirect(url_for('auth.login'))
-                user = get_user_by_id(user_id)
-                if not _user_can_access(user, filename):
-                    return redirect('/')
-            # Prefer files under frontend/, but fall back to project root for legacy pages
-            try:
-                return send_from_directory(FRONTEND_DIR, filename)
-            except NotFound:
-                try:
-                    return send_from_directory(PROJECT_ROOT, filename)
-                except NotFound:
-                    return redirect('/')
         # Redirect to modern tile-based homepage for any unknown routes
         return redirect('/')
 
+    # Let WhiteNoise serve /assets straight from the WSGI layer: files are
+    # indexed once at startup, pre-compressed .gz/.br siblings (see
+    # `python -m whitenoise.compress assets`) are picked by Accept-Encoding,
+    # and cache headers are set. HTML pages stay on the Flask routes above
+    # because some of them are premium-gated. Behind nginx the proxy already
+    # serves /assets with sendfile, so the middleware would be dead weight.
+    if WhiteNoise is not None and not app.config['BEHIND_NGINX']:
+        app.wsgi_app = WhiteNoise(app.wsgi_app, max_age=_ASSET_MAX_AGE, autorefresh=app.config['ASSET_AUTOREFRESH'])
+        app.wsgi_app.add_files(_ASSETS_DIR, prefix='assets/')
+
+    # Compress API JSON and HTML responses (adds Vary: Accept-Encoding). Behind
+    # nginx the proxy compresses instead.
+    if Compress is not None and not app.config['BEHIND_NGINX']:
+        Compress(app)
+
     # User session API
     @app.get('/api/user-session')
     def api_user_session():
         """Return current user session info for profile display."""
-        if 'user' in session or 'user_id' in session:
-            user = None
+        # One read per session key; most callers are anonymous page loads
+        user_id = session.get('user_id')
+        email = session.get('user')
+        if email is not None or user_id is not None:
             try:
-                uid = session.get('user_id')
-                if uid:
-                    user = get_user_by_id(uid)
+                user = _current_user()
             except Exception:
                 user = None
             info = {
                 'logged_in': True,
-                'email': session.get('user', session.get('email', '')),
-                'user_id': session.get('user_id'),
+                'email': email if email is not None else session.get('email', ''),
+                'user_id': user_id,
             }
             if user:
                 info['is_premium'] = bool(user.get('is_premium') or False)
                 info['allowed_tools'] = user.get('allowed_tools')
             return jsonify(info)
-        return jsonify({'logged_in': False})
+        # Constant body for anonymous visitors; only the Response is per-call.
+        # Vary: Cookie (added by the session) makes the browser refetch as
+        # soon as a login changes the session cookie.
+        resp = app.response_class(_ANON_SESSION_BODY, mimetype='application/json')
+        resp.cache_control.private = True
+        resp.cache_control.max_age = _ANON_SESSION_MAX_AGE
+        return resp
 
     # Profile API
     @app.get('/api/profile')
@@ -156,7 +344,7 @@ def create_app():
         if not user_id:
             return jsonify({'ok': False, 'error': 'Not logged in'}), 401
         
-        user = get_user_by_id(user_id)
+        user = _current_user()
         if not user:
             return jsonify({'ok': False, 'error': 'User not found'}), 404
         
@@ -184,32 +372,21 @@ def create_app():
         if len(new_password) < 6:
             return jsonify({'ok': False, 'error': 'Password must be at least 6 characters'})
         
-        # Get user and verify current password
-        user = get_user_by_id(user_id)
-        if not user:
-            return jsonify({'ok': False, 'error': 'User not found'}), 404
-
-        # Get full user record with password_hash (adapter returns dict)
-        user_full = get_user_by_email(user['email'])
+        # Get full user record with password_hash in one query (adapter returns dict)
+        user_full = get_user_full_by_id(user_id)
         if not user_full:
             return jsonify({'ok': False, 'error': 'User not found'}), 404
         
-        # Extract password hash (dict by default; tuple fallback supported)
-        if isinstance(user_full, dict):
-            password_hash = user_full.get('password_hash')
-        else:
-            # Expected order when selected explicitly: id, email, password_hash, mobile, registered_at
-            password_hash = user_full[2] if len(user_full) > 2 else None
-        
+        password_hash = user_full.get('password_hash')
         if not password_hash:
             return jsonify({'ok': False, 'error': 'Password verification failed'}), 500
         
         # Verify current password
-        if not check_password_hash(password_hash, current_password):
+        if not check_password(password_hash, current_password):
             return jsonify({'ok': False, 'error': 'Current password is incorrect'})
         
         # Update password
-        new_hash = generate_password_hash(new_password)
+        new_hash = hash_password(new_password)
         success = update_user_password(user_id, new_hash)
         
         if success:
@@ -217,99 +394,78 @@ def create_app():
         else:
             return jsonify({'ok': False, 'error': 'Failed to update password'}), 500
 
-    # API endpoints
-    @app.post('/api/email-analyzer')
-    def api_email_analyzer():
-        result = analyze_email_tool(request)
-        _log_tool('email-analyzer', request, result)
-        return jsonify(result)
-
-    @app.post('/api/url-scanner')
-    def api_url_scanner():
-        result = scan_url_tool(request)
-        _log_tool('url-scanner', request, result)
-        return jsonify(result)
-
-    @app.post('/api/password-cracker')
-    def api_password_cracker():
-        result = crack_hash_tool(request)
-        _log_tool('password-cracker', request, result)
-        return jsonify(result)
-
-    @app.post('/api/sms-spam-tester')
-    def api_sms_spam_tester():
-        result = test_sms_tool(request)
-        _log_tool('sms-spam-tester', request, result)
-        return jsonify(result)
-
-    @app.post('/api/malware-analyzer')
-    def api_malware_analyzer():
-        result = analyze_file_tool(request)
-        _log_tool('malware-analyzer', request, result)
-        return jsonify(result)
+    # Tool API: one rule dispatching on _TOOL_FUNCS. The any() converter only
+    # matches tool names, so other /api/* paths keep their own 404/405s.
+    _tool_names = ', '.join(f'"{name}"' for name in _TOOL_FUNCS)
 
-    @app.post('/api/web-recon')
-    def api_web_recon():
-        result = recon_target_tool(request)
-        _log_tool('web-recon', request, result)
-        return jsonify(result)
-
-    @app.post('/api/stegoshield-inspector')
-    def api_stegoshield_inspector():
-        result = analyze_stegoshield_tool(request)
-        _log_tool('stegoshield-inspector', request, result)
-        return jsonify(result)
-
-    @app.post('/api/stegoshield-extractor')
-    def api_stegoshield_extractor():
-        result = analyze_stegoshield_extractor(request)
-        _log_tool('stegoshield-extractor', request, result)
+    @app.post(f'/api/<any({_tool_names}):tool_name>')
+    def api_tool(tool_name):
+        result = _get_tool(tool_name)(request)
+        _log_tool(tool_name, request, result)
         return jsonify(result)
 
     def _log_tool(tool_name, req, result):
+        # Queued for the background writer; no DB work on the request thread
         try:
-            db = get_db()
-            db.execute(
-                'INSERT INTO tool_logs(tool_name, input, result) VALUES (?, ?, ?)',
-                (
-                    tool_name,
-                    _safe_str(_extract_input(req)),
-                    _safe_str(result),
-                ),
+            queued = enqueue_tool_log(
+                tool_name,
+                _safe_str(_extract_input(req)),
+                _safe_str(result),
             )
-            db.commit()
+            if not queued:
+                app.logger.debug(f"Log dropped (queue full): {tool_name}")
         except Exception as e:
             app.logger.debug(f"Log failed: {e}")
 
     def _extract_input(req):
         if req.is_json:
+            # Don't copy oversized JSON bodies into tool_logs; record the size
+            if req.content_length and req.content_length > _MAX_LOGGED_INPUT:
+                return {'omitted': 'request body too large to log', 'bytes': req.content_length}
             return req.get_json(silent=True) or {}
-        if req.form:
-            return dict(req.form)
-        return {}
+        # to_dict() builds the first-value mapping in one pass over the MultiDict
+        return req.form.to_dict() if req.form else {}
 
     def _safe_str(obj):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+            except TypeError:
+                pass  # e.g. unsupported types; let the stdlib encoder try
         try:
-            import json
             return json.dumps(obj, ensure_ascii=False)
         except Exception:
             return str(obj)
 
-    def _user_can_access(user: dict, filename: str) -> bool:
-        """Evaluate if the user can access a restricted page."""
-        if not user:
-            return False
-        # Premium flag grants all premium pages
-        if user.get('is_premium'):
-            return True
-        # Otherwise check explicit allowed_tools list (stored as JSON or CSV)
-        raw = user.get('allowed_tools') or ''
-        try:
-            import json
-            tools = json.loads(raw) if raw and raw.strip().startswith('[') else [t.strip() for t in raw.split(',') if t.strip()]
-        except Exception:
-            tools = [t.strip() for t in str(raw).split(',') if t.strip()]
-        return filename in set(tools)
+    def _current_user():
+        """The logged-in user's record, looked up at most once per request."""
+        if '_current_user' not in g:
+            user_id = session.get('user_id')
+            g._current_user = get_user_by_id(user_id) if user_id else None
+        return g._current_user
+
+    def _user_can_access(filename: str) -> bool:
+        """Evaluate if the logged-in user can access a restricted page.
+
+        Premium flag and allowed_tools are cached in the session cookie for
+        _ENTITLEMENT_TTL seconds (and dropped when a coupon is redeemed), so
+        repeat loads within that window skip the query.
+        """
+        cached = session.get('_allowed')
+        # Keyed on user_id so a login as someone else doesn't inherit it
+        if (not cached or len(cached) != 4 or cached[0] != session.get('user_id')
+                or time.time() >= cached[3]):
+            user = _current_user()
+            if not user:
+                session.pop('_allowed', None)
+                return False
+            cached = session['_allowed'] = [
+                session.get('user_id'),
+                bool(user.get('is_premium')),
+                sorted(_parse_allowed_tools(str(user.get('allowed_tools') or ''))),
+                time.time() + _ENTITLEMENT_TTL,
+            ]
+        return cached[1] or filename in cached[2]
 
     @app.post('/api/redeem-coupon')
     def api_redeem_coupon():
@@ -323,24 +479,21 @@ def create_app():
         if not code:
             return jsonify({'ok': False, 'error': 'Coupon code required'}), 400
 
-        configured = os.getenv('COUPON_CODE', '')
-        if not configured:
+        if not _COUPON_CODE:
             return jsonify({'ok': False, 'error': 'Coupon not configured'}), 500
 
-        if code != configured:
+        if not hmac.compare_digest(code.encode(), _COUPON_CODE):
             return jsonify({'ok': False, 'error': 'Invalid coupon code'}), 400
 
         # Apply entitlements from env
-        grant_premium = os.getenv('COUPON_GRANT_PREMIUM', 'false').lower() in ('1', 'true', 'yes')
-        tools_env = os.getenv('PREMIUM_ALLOWED_TOOLS', '')
-        tools = [t.strip() for t in tools_env.split(',') if t.strip()]
-
-        success = update_user_entitlements(user_id, is_premium=grant_premium if grant_premium else None,
-                                           allowed_tools=tools if tools else None)
+        success = update_user_entitlements(user_id, is_premium=True if _COUPON_GRANT_PREMIUM else None,
+                                           allowed_tools=_COUPON_TOOLS or None)
         if not success:
             return jsonify({'ok': False, 'error': 'Failed to apply entitlements'}), 500
 
-        user = get_user_by_id(user_id)
+        # Re-read (and refresh the per-request cache) now that entitlements changed
+        g._current_user = user = get_user_by_id(user_id)
+        session.pop('_allowed', None)
         return jsonify({'ok': True, 'message': 'Coupon applied', 'is_premium': bool(user.get('is_premium')), 'allowed_tools': user.get('allowed_tools')})
 
     # Web vulnerability scanner endpoints are provided by the API blueprint (Backend/api.py)
@@ -1,6 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
-from .db_adapter import insert_user, get_db_connection, get_user_by_email
+import os
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash
+from .db_adapter import insert_user, get_user_by_email, update_user_password
+from .tools.auth_utils import check_password, hash_password, needs_rehash
+
+# Checked against when the email is unknown, so a miss costs the same Argon2
+# work as a wrong password and response time doesn't reveal which accounts exist.
+# CONSTANT_TIME_LOGIN=0 skips it (local dev only).
+_CONSTANT_TIME_LOGIN = os.getenv('CONSTANT_TIME_LOGIN', '1') != '0'
+_DUMMY_HASH = hash_password('!invalid!') if _CONSTANT_TIME_LOGIN else None
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -30,7 +38,7 @@ def register():
 
         # persist to database (MySQL or SQLite)
         try:
-            pwd_hash = generate_password_hash(password)
+            pwd_hash = hash_password(password)
             insert_user(email, mobile or None, pwd_hash)
         except ValueError as e:
             # Duplicate email
@@ -65,39 +73,40 @@ def login():
 
             if not user:
                 # User not found
+                if _CONSTANT_TIME_LOGIN:
+                    check_password(_DUMMY_HASH, password)
                 flash('Invalid email or password.', 'error')
-                print(f"[LOGIN] User not found: {email}")
+                current_app.logger.warning('[LOGIN] User not found: %s', email)
                 return render_template('login.html')
 
-            # Extract user data (dict expected; tuple fallback retained just in case)
-            if isinstance(user, dict):
-                user_id = user.get('id')
-                user_email = user.get('email')
-                password_hash = user.get('password_hash')
-            else:
-                # Fallback for legacy tuple return
-                user_id = user[0]
-                user_email = user[1]
-                # Most schemas: id, email, password_hash, mobile, registered_at
-                password_hash = user[2] if len(user) > 2 else None
-            
-            # Verify password using Werkzeug's secure hash comparison
-            if check_password_hash(password_hash, password):
+            user_id = user['id']
+            user_email = user['email']
+            password_hash = user['password_hash']
+
+            # Verify password (Argon2, or a legacy Werkzeug hash)
+            if check_password(password_hash, password):
+                # Upgrade legacy pbkdf2/scrypt (or outdated Argon2) hashes now
+                # that we have the plaintext; best-effort
+                if needs_rehash(password_hash):
+                    try:
+                        update_user_password(user_id, hash_password(password))
+                    except Exception as e:
+                        current_app.logger.warning('[LOGIN] Hash upgrade failed for %s: %s', user_email, e)
                 # Password correct - create session
                 session['user_id'] = user_id
                 session['user'] = user_email
                 flash('Logged in successfully!', 'success')
-                print(f"[LOGIN] Success: {user_email}")
+                current_app.logger.info('[LOGIN] Success: %s', user_email)
                 return redirect(url_for('index'))
             else:
                 # Password wrong
                 flash('Invalid email or password.', 'error')
-                print(f"[LOGIN] Invalid password for: {user_email}")
+                current_app.logger.warning('[LOGIN] Invalid password for: %s', user_email)
                 return render_template('login.html')
                 
         except Exception as e:
             flash(f'Login error: {str(e)}', 'error')
-            print(f"[LOGIN ERROR] {str(e)}")
+            current_app.logger.error('[LOGIN ERROR] %s', e)
             return render_template('login.html')
         finally:
             pass
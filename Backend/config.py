@@ -18,6 +18,15 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
     DATABASE = DB_PATH
     TEMPLATES_AUTO_RELOAD = True
+    # Set when nginx serves /assets and the homepage itself (see nginx.conf);
+    # the app then skips its own static-file middleware
+    BEHIND_NGINX = os.environ.get('BEHIND_NGINX', '').lower() in ('1', 'true', 'yes')
+    # app.debug is still False while create_app runs, so the asset middleware
+    # reads the debug flag from the environment (`flask --debug run` sets it)
+    ASSET_AUTOREFRESH = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+    # Response compression (used when flask-compress is installed)
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_MIN_SIZE = 1024
 
 
 # DoS detector configuration (tunable)
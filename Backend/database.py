@@ -1,33 +1,182 @@
+import atexit
 import os
+import queue
 import sqlite3
+import threading
+import time
 from flask import g
 from .config import DB_DIR, DB_PATH, SCHEMA_PATH
+from .db_adapter import SQLITE_PRAGMAS
 
 
 def ensure_db_dir():
     os.makedirs(DB_DIR, exist_ok=True)
 
 
+# Connections handed out by get_db are pooled rather than opened per request,
+# so SQLite's page cache and statement cache stay warm between requests.
+_POOL_SIZE = 8
+_db_pool = queue.LifoQueue(maxsize=_POOL_SIZE)
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=5)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+
 def get_db():
     if 'db' not in g:
-        ensure_db_dir()
-        g.db = sqlite3.connect(DB_PATH)
-        g.db.row_factory = sqlite3.Row
+        try:
+            g.db = _db_pool.get_nowait()
+        except queue.Empty:
+            ensure_db_dir()
+            g.db = _connect()
     return g.db
 
 
 def close_db(e=None):
     db = g.pop('db', None)
-    if db is not None:
+    if db is None:
+        return
+    try:
+        # Don't pool a connection with an open transaction
+        if db.in_transaction:
+            db.rollback()
+        _db_pool.put_nowait(db)
+    except Exception:
+        # Pool full (or connection broken): just close it
         db.close()
 
 
 def init_db(app=None):
     ensure_db_dir()
     conn = sqlite3.connect(DB_PATH)
+    conn.executescript(SQLITE_PRAGMAS)
     with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
         conn.executescript(f.read())
     conn.commit()
     conn.close()
     if app:
         app.logger.info('Database initialized at %s', DB_PATH)
+
+
+# Tool-log writer: API handlers enqueue rows and a single background thread
+# inserts them in batches, one transaction per batch, off the request path.
+_LOG_INSERT_SQL = 'INSERT INTO tool_logs(tool_name, input, result) VALUES (?, ?, ?)'
+_LOG_BATCH_SIZE = 500
+_LOG_FLUSH_INTERVAL = 0.2  # seconds
+_log_queue = queue.Queue(maxsize=10000)
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def enqueue_tool_log(tool_name, input_text, result_text):
+    """Queue a tool_logs row for the background writer.
+
+    Returns False if the queue is full and the row was dropped.
+    """
+    try:
+        _log_queue.put_nowait((tool_name, input_text, result_text))
+        return True
+    except queue.Full:
+        return False
+
+
+def start_log_writer(app=None):
+    """Start the background tool-log writer thread (once per process)."""
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is not None and _log_writer.is_alive():
+            return
+        _log_writer = threading.Thread(target=_log_writer_loop, name='tool-log-writer', daemon=True)
+        _log_writer.start()
+    if app:
+        app.logger.info('Tool log writer started')
+
+
+def _next_log_batch():
+    """Block for one row, then collect more until the batch is full or the flush interval passes."""
+    batch = [_log_queue.get()]
+    deadline = time.monotonic() + _LOG_FLUSH_INTERVAL
+    while len(batch) < _LOG_BATCH_SIZE:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(_log_queue.get(timeout=timeout))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _open_log_conn():
+    """Connection for the log writer: WAL so batches don't block readers, and
+    synchronous=NORMAL so a commit doesn't wait on fsync."""
+    ensure_db_dir()
+    conn = sqlite3.connect(DB_PATH, timeout=5)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _write_log_batch(conn, batch):
+    with conn:  # one transaction for the whole batch
+        conn.executemany(_LOG_INSERT_SQL, batch)
+
+
+def _log_writer_loop():
+    conn = None
+    while True:
+        batch = _next_log_batch()
+        try:
+            if conn is None:
+                conn = _open_log_conn()
+            _write_log_batch(conn, batch)
+        except Exception as e:
+            # Logging is best-effort: drop the batch and reconnect next time
+            print(f"[DB] Tool log batch of {len(batch)} dropped: {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            conn = None
+
+
+def _reset_after_fork():
+    """Give a forked child (gunicorn preload_app) fresh queues and locks.
+
+    The parent's writer thread doesn't exist in the child, but its waiter is
+    still registered on the copied queue and would swallow every wake-up;
+    pooled connections must not be shared across processes either.
+    """
+    global _log_queue, _log_writer, _log_writer_lock, _db_pool
+    _log_queue = queue.Queue(maxsize=10000)
+    _log_writer = None
+    _log_writer_lock = threading.Lock()
+    _db_pool = queue.LifoQueue(maxsize=_POOL_SIZE)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@atexit.register
+def _flush_tool_logs():
+    """Write any rows still queued when the interpreter exits."""
+    batch = []
+    while True:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if not batch:
+        return
+    try:
+        conn = _open_log_conn()
+        _write_log_batch(conn, batch)
+        conn.close()
+    except Exception:
+        pass
@@ -4,39 +4,62 @@ Unified database adapter that supports PostgreSQL, MySQL, and SQLite.
 - Uses MySQL if MYSQL_HOST is configured (local development with Workbench)
 - Falls back to SQLite if no config (basic local development)
 """
+import json
 import os
+import re
 import sqlite3
-from flask import g
+import threading
+from flask import abort, g
+
+from .config import DB_DIR, DB_PATH
 
 # Try to import PostgreSQL support
 try:
-    import importlib
-    psycopg2 = importlib.import_module('psycopg2')
+    import psycopg2
+    import psycopg2.pool
+    import psycopg2.extras
     try:
-        PgDictCursor = importlib.import_module('psycopg2.extras').DictCursor
+        from psycopg2.extras import DictCursor as PgDictCursor
     except Exception:
         PgDictCursor = None
+    try:
+        from psycopg2.errors import UniqueViolation as PgUniqueViolation
+    except Exception:
+        PgUniqueViolation = None
     POSTGRES_AVAILABLE = True
 except Exception:
     POSTGRES_AVAILABLE = False
     psycopg2 = None
     PgDictCursor = None
+    PgUniqueViolation = None
 
 # Try to import MySQL support
 try:
-    # Import dynamically to avoid linter/IDE import resolution errors when the
-    # optional dependency isn't installed in every environment.
-    import importlib
-    pymysql = importlib.import_module('pymysql')
+    import pymysql
     try:
-        DictCursor = importlib.import_module('pymysql.cursors').DictCursor
+        from pymysql.cursors import DictCursor, Cursor as TupleCursor
     except Exception:
         DictCursor = None
+        TupleCursor = None
     MYSQL_AVAILABLE = True
 except Exception:
     MYSQL_AVAILABLE = False
     pymysql = None
     DictCursor = None
+    TupleCursor = None
+
+try:
+    from dbutils.pooled_db import PooledDB  # optional; pools PyMySQL connections
+except Exception:  # pragma: no cover - optional dependency
+    PooledDB = None
+
+# Backend picked once from the environment: PostgreSQL > MySQL > SQLite
+if POSTGRES_AVAILABLE and os.environ.get('DATABASE_URL'):
+    _BACKEND = 'postgres'
+elif MYSQL_AVAILABLE and os.environ.get('MYSQL_HOST'):
+    _BACKEND = 'mysql'
+else:
+    _BACKEND = 'sqlite'
 
 
 def get_db_connection():
@@ -45,41 +68,41 @@ def get_db_connection():
     Priority: PostgreSQL > MySQL > SQLite
     """
     # Check if we already have a connection in this request
-    if 'db_conn' in g:
-        return g.db_conn
-    
-    # Try PostgreSQL first (for Render production)
-    if POSTGRES_AVAILABLE and os.environ.get('DATABASE_URL'):
-        conn = _get_postgres_connection()
-        if conn:
-            g.db_conn = conn
-            g.db_type = 'postgres'
-            return conn
+    conn = g.get('db_conn')
+    if conn is not None:
+        return conn
     
-    # Try MySQL second (for local development)
-    if MYSQL_AVAILABLE and os.environ.get('MYSQL_HOST'):
-        conn = _get_mysql_connection()
+    # PostgreSQL (Render production) or MySQL (local Workbench) when configured
+    if _BACKEND != 'sqlite':
+        conn = _get_postgres_connection() if _BACKEND == 'postgres' else _get_mysql_connection()
         if conn:
             g.db_conn = conn
-            g.db_type = 'mysql'
+            g.db_type = _BACKEND
             return conn
     
-    # Fall back to SQLite (basic local dev)
+    # Fall back to SQLite (basic local dev, or the server DB is unreachable)
     conn = _get_sqlite_connection()
     g.db_conn = conn
     g.db_type = 'sqlite'
     return conn
 
 
-def _get_postgres_connection():
-    """Get PostgreSQL connection if configured."""
+# Request connections come from a per-process pool, created on first use so
+# gunicorn's preloaded master never holds sockets its workers would share
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+_PG_POOL_MAX = int(os.environ.get('PG_POOL_MAX', 20))
+# Requests wait this long for a free pooled connection before getting a 503
+_PG_POOL_TIMEOUT = float(os.environ.get('PG_POOL_TIMEOUT', 10))
+_pg_slots = threading.BoundedSemaphore(_PG_POOL_MAX)
+# Render uses postgres:// but psycopg2 needs postgresql://
+_PG_DSN = re.sub(r'^postgres://', 'postgresql://', os.environ.get('DATABASE_URL') or '') or None
+
+
+def _connect_postgres():
+    """Open a standalone PostgreSQL connection (used for table setup)."""
     try:
-        database_url = os.environ.get('DATABASE_URL')
-        # Render uses postgres:// but psycopg2 needs postgresql://
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        
-        conn = psycopg2.connect(database_url)
+        conn = psycopg2.connect(_PG_DSN)
         conn.autocommit = False  # Use transactions
         print("[DB] Connected to PostgreSQL")
         return conn
@@ -88,60 +111,242 @@ def _get_postgres_connection():
         return None
 
 
+def _get_postgres_connection():
+    """Check out a pooled PostgreSQL connection; return it via close_db_connection.
+
+    Waits for a free slot when all _PG_POOL_MAX connections are in use and
+    answers 503 if none frees up in time, rather than letting the request
+    fall back to another datastore.
+    """
+    global _pg_pool
+    if not _pg_slots.acquire(timeout=_PG_POOL_TIMEOUT):
+        print(f"[DB] PostgreSQL pool exhausted after {_PG_POOL_TIMEOUT}s")
+        abort(503, 'Database busy, please retry shortly')
+    try:
+        if _pg_pool is None:
+            with _pg_pool_lock:
+                if _pg_pool is None:
+                    _pg_pool = psycopg2.pool.ThreadedConnectionPool(2, _PG_POOL_MAX, _PG_DSN)
+                    print(f"[DB] PostgreSQL pool ready (max {_PG_POOL_MAX})")
+        conn = _pg_pool.getconn()
+        if not _postgres_alive(conn):
+            # Dropped by the server or a proxy while idle; swap for a fresh one
+            _pg_pool.putconn(conn, close=True)
+            conn = _pg_pool.getconn()
+        conn.autocommit = False  # Use transactions
+        return conn
+    except Exception as e:
+        _pg_slots.release()
+        print(f"[DB] PostgreSQL connection failed: {e}")
+        return None
+
+
+def _postgres_alive(conn):
+    """Round-trip a trivial query; False if the connection is unusable."""
+    if conn.closed:
+        return False
+    try:
+        conn.autocommit = True  # client-side switch; no transaction left open
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        return True
+    except Exception:
+        return False
+
+
+def _release_postgres_connection(conn):
+    """Return a connection to the pool, discarding it if it's broken."""
+    try:
+        conn.rollback()  # never hand the next request an open transaction
+        _pg_pool.putconn(conn)
+    except Exception:
+        try:
+            _pg_pool.putconn(conn, close=True)
+        except Exception:
+            pass
+    finally:
+        _pg_slots.release()
+
+
+def _reset_pg_pool_after_fork():
+    # The parent's sockets are not ours to use or close
+    global _pg_pool, _pg_pool_lock, _pg_slots
+    _pg_pool = None
+    _pg_pool_lock = threading.Lock()
+    _pg_slots = threading.BoundedSemaphore(_PG_POOL_MAX)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pg_pool_after_fork)
+
+
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+_MYSQL_POOL_MAX = int(os.environ.get('MYSQL_POOL_MAX', 25))
+
+
+def _mysql_params():
+    ssl_enabled = os.getenv('MYSQL_USE_SSL', 'false').lower() == 'true'
+    
+    connection_params = {
+        'host': os.environ.get('MYSQL_HOST'),
+        'port': int(os.environ.get('MYSQL_PORT', 3306)),
+        'user': os.environ.get('MYSQL_USER'),
+        'password': os.environ.get('MYSQL_PASSWORD'),
+        'database': os.environ.get('MYSQL_DB'),
+        'charset': 'utf8mb4',
+        'cursorclass': DictCursor,
+        'autocommit': False
+    }
+    
+    if ssl_enabled:
+        connection_params['ssl'] = {'ssl_mode': 'REQUIRED'}
+    return connection_params
+
+
+def _connect_mysql():
+    """Open a standalone MySQL connection (used for table setup)."""
+    try:
+        return pymysql.connect(**_mysql_params())
+    except Exception:
+        return None
+
+
 def _get_mysql_connection():
-    """Get MySQL connection if configured."""
+    """Get a MySQL connection for this request.
+
+    With DBUtils installed this is a pooled proxy whose close() hands the
+    connection back (after a rollback) instead of disconnecting.
+    """
+    global _mysql_pool
+    if PooledDB is None:
+        return _connect_mysql()
     try:
-        ssl_enabled = os.getenv('MYSQL_USE_SSL', 'false').lower() == 'true'
-        
-        connection_params = {
-            'host': os.environ.get('MYSQL_HOST'),
-            'port': int(os.environ.get('MYSQL_PORT', 3306)),
-            'user': os.environ.get('MYSQL_USER'),
-            'password': os.environ.get('MYSQL_PASSWORD'),
-            'database': os.environ.get('MYSQL_DB'),
-            'charset': 'utf8mb4',
-            'cursorclass': DictCursor,
-            'autocommit': False
-        }
-        
-        if ssl_enabled:
-            connection_params['ssl'] = {'ssl_mode': 'REQUIRED'}
-        
-        return pymysql.connect(**connection_params)
+        if _mysql_pool is None:
+            with _mysql_pool_lock:
+                if _mysql_pool is None:
+                    _mysql_pool = PooledDB(creator=pymysql, mincached=2, maxcached=10,
+                                           maxconnections=_MYSQL_POOL_MAX, blocking=True,
+                                           ping=1, **_mysql_params())
+        return _mysql_pool.connection()
     except Exception:
         return None
 
 
-def _get_sqlite_connection():
-    """Get SQLite connection."""
-    db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
-    os.makedirs(db_dir, exist_ok=True)
-    db_path = os.path.join(db_dir, 'app.db')
-    
-    conn = sqlite3.connect(db_path)
+def _reset_mysql_pool_after_fork():
+    global _mysql_pool, _mysql_pool_lock
+    _mysql_pool = None
+    _mysql_pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_mysql_pool_after_fork)
+
+
+# One SQLite connection per worker thread, reused across requests
+_sqlite_local = threading.local()
+
+# Applied once when each SQLite connection is opened, here and by the
+# connections in database.py. WAL lets the admin readers run alongside
+# tool-log inserts without blocking on them.
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-20000;
+    PRAGMA busy_timeout=5000;
+"""
+
+
+def _connect_sqlite():
+    """Open a new SQLite connection."""
+    os.makedirs(DB_DIR, exist_ok=True)
+
+    # Autocommit mode so a reused connection never carries an open transaction
+    # from one request into the next; explicit commit() calls become no-ops.
+    # The larger statement cache keeps the app's fixed queries compiled.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                           cached_statements=256)
     conn.row_factory = sqlite3.Row  # Return dict-like rows
+    conn.executescript(SQLITE_PRAGMAS)
     return conn
 
 
+def _get_sqlite_connection():
+    """Get this thread's SQLite connection, opening it on first use."""
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is None:
+        conn = _connect_sqlite()
+        _sqlite_local.conn = conn
+    return conn
+
+
+def get_tuple_cursor(conn):
+    """
+    Return a cursor whose rows support positional access on every backend.
+    MySQL connections default to DictCursor, so ask for a plain tuple cursor.
+    """
+    if g.get('db_type') == 'mysql' and TupleCursor is not None:
+        return conn.cursor(TupleCursor)
+    return conn.cursor()
+
+
 def close_db_connection(e=None):
-    """Close the database connection."""
+    """Release the request's database connection.
+
+    SQLite connections stay open for reuse by the same thread (after a
+    PRAGMA optimize); PostgreSQL connections go back to the pool, and closing
+    a MySQL connection returns it to its pool when DBUtils is installed.
+    """
     conn = g.pop('db_conn', None)
-    if conn is not None:
-        try:
+    db_type = g.pop('db_type', None)
+    if conn is None:
+        return
+    try:
+        if db_type == 'sqlite':
+            # Cheap when there is nothing to do; keeps planner stats fresh
+            conn.execute('PRAGMA optimize')
+        elif db_type == 'postgres':
+            _release_postgres_connection(conn)
+        else:
             conn.close()
-        except Exception:
-            pass
+    except Exception:
+        pass
+
+
+# Dialect-specific SQL used by the admin views. Looked up per request via
+# dialect_sql(), since a request can fall back to SQLite when the configured
+# server is unreachable.
+_DIALECT_SQL = {
+    'postgres': {
+        'SQL_LIST_TABLES': "SELECT tablename FROM pg_tables WHERE schemaname='public'",
+        'SQL_USER_TOTALS': "SELECT COUNT(*), SUM(CASE WHEN registered_at > NOW() - INTERVAL '7 days' THEN 1 ELSE 0 END) FROM users",
+        'SQL_LIMIT_OFFSET': " LIMIT %s OFFSET %s",
+    },
+    'mysql': {
+        'SQL_LIST_TABLES': "SHOW TABLES",
+        'SQL_USER_TOTALS': "SELECT COUNT(*), SUM(CASE WHEN registered_at > DATE_SUB(NOW(), INTERVAL 7 DAY) THEN 1 ELSE 0 END) FROM users",
+        'SQL_LIMIT_OFFSET': " LIMIT %s OFFSET %s",
+    },
+    'sqlite': {
+        'SQL_LIST_TABLES': "SELECT name FROM sqlite_master WHERE type='table'",
+        'SQL_USER_TOTALS': "SELECT COUNT(*), SUM(CASE WHEN registered_at > datetime('now', '-7 days') THEN 1 ELSE 0 END) FROM users",
+        'SQL_LIMIT_OFFSET': " LIMIT ? OFFSET ?",
+    },
+}
+
+
+def dialect_sql(name):
+    """Return the SQL snippet `name` for the current request's connection."""
+    return _DIALECT_SQL[g.get('db_type', 'sqlite')][name]
 
 
 def init_database(app):
     """Initialize database tables for PostgreSQL, MySQL, or SQLite."""
-    # Determine which database we're using
-    using_postgres = POSTGRES_AVAILABLE and os.environ.get('DATABASE_URL')
-    using_mysql = MYSQL_AVAILABLE and os.environ.get('MYSQL_HOST')
-    
-    if using_postgres:
+    if _BACKEND == 'postgres':
         _init_postgres_tables(app)
-    elif using_mysql:
+    elif _BACKEND == 'mysql':
         _init_mysql_tables(app)
     else:
         _init_sqlite_tables(app)
@@ -150,7 +355,7 @@ def init_database(app):
 def _init_postgres_tables(app):
     """Create PostgreSQL tables."""
     try:
-        conn = _get_postgres_connection()
+        conn = _connect_postgres()
         if not conn:
             app.logger.info('PostgreSQL not configured; skipping Postgres init')
             return
@@ -171,6 +376,11 @@ def _init_postgres_tables(app):
                 cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_ci ON users (LOWER(email))")
             except Exception:
                 pass
+            # Newest-first index for the paginated admin user lists
+            try:
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_users_reg ON users (registered_at DESC)")
+            except Exception:
+                pass
             # Add entitlement columns if missing
             try:
                 cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS is_premium BOOLEAN DEFAULT FALSE")
@@ -209,7 +419,7 @@ def _init_postgres_tables(app):
 def _init_mysql_tables(app):
     """Create MySQL tables."""
     try:
-        conn = _get_mysql_connection()
+        conn = _connect_mysql()
         if not conn:
             app.logger.info('MySQL not configured; skipping MySQL init')
             return
@@ -235,6 +445,11 @@ def _init_mysql_tables(app):
                 cur.execute("CREATE UNIQUE INDEX idx_email_ci ON users (email_ci)")
             except Exception:
                 pass
+            # Newest-first index for the paginated admin user lists
+            try:
+                cur.execute("CREATE INDEX idx_users_reg ON users (registered_at DESC)")
+            except Exception:
+                pass
             # Add entitlement columns if missing
             try:
                 cur.execute("ALTER TABLE users ADD COLUMN is_premium TINYINT(1) DEFAULT 0")
@@ -251,21 +466,28 @@ def _init_mysql_tables(app):
         app.logger.warning(f'MySQL init failed: {e}')
 
 
+# Base SQLite schema, compiled and run as one script at startup
+_SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL UNIQUE,
+        mobile TEXT,
+        password_hash TEXT NOT NULL,
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_email ON users(email);
+    -- Newest-first index for the paginated admin user lists
+    CREATE INDEX IF NOT EXISTS idx_users_reg ON users(registered_at DESC);
+"""
+
+
 def _init_sqlite_tables(app):
     """Create SQLite tables."""
     try:
-        conn = _get_sqlite_connection()
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL UNIQUE,
-                mobile TEXT,
-                password_hash TEXT NOT NULL,
-                registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_email ON users(email)")
-        # Case-insensitive unique email index using expression index
+        conn = _connect_sqlite()
+        conn.executescript(_SQLITE_SCHEMA)
+        # Case-insensitive unique email index using expression index (fails
+        # on legacy data with case-variant duplicates, so kept separate)
         try:
             conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_ci ON users(lower(email))")
         except Exception:
@@ -317,11 +539,68 @@ def insert_user(email, mobile, password_hash):
             conn.commit()
         return True
     except Exception as e:
-        # Check for duplicate email
-        error_msg = str(e).lower()
-        if 'duplicate' in error_msg or 'unique' in error_msg:
+        if _is_duplicate_key(e):
             raise ValueError("Email is already registered")
-        raise e
+        raise
+
+
+def insert_users_bulk(rows):
+    """
+    Insert many users in one transaction; rows are (email, mobile, password_hash).
+    All-or-nothing: a duplicate email rolls back the batch and raises ValueError.
+    Returns the number of rows inserted.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    conn = get_db_connection()
+    db_type = g.get('db_type', 'sqlite')
+
+    try:
+        if db_type == 'postgres':
+            with conn.cursor() as cur:
+                # One multi-row INSERT per page instead of a statement per row
+                psycopg2.extras.execute_values(
+                    cur, "INSERT INTO users (email, mobile, password_hash) VALUES %s", rows, page_size=500
+                )
+            conn.commit()
+        elif db_type == 'mysql':
+            with conn.cursor() as cur:
+                # PyMySQL folds this into multi-row INSERT packets
+                cur.executemany(
+                    "INSERT INTO users (email, mobile, password_hash) VALUES (%s, %s, %s)",
+                    rows
+                )
+            conn.commit()
+        else:  # sqlite
+            # The connection is in autocommit mode; group the batch explicitly
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO users (email, mobile, password_hash) VALUES (?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        return len(rows)
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        if _is_duplicate_key(e):
+            raise ValueError("Email is already registered")
+        raise
+
+
+def _is_duplicate_key(e):
+    """True if e is a unique-constraint violation on any backend."""
+    if isinstance(e, sqlite3.IntegrityError):
+        # vs. NOT NULL / CHECK failures, which share the exception type
+        return bool(e.args) and str(e.args[0]).startswith('UNIQUE')
+    if PgUniqueViolation is not None and isinstance(e, PgUniqueViolation):
+        return True
+    if pymysql is not None and isinstance(e, pymysql.err.IntegrityError):
+        return bool(e.args) and e.args[0] == 1062  # ER_DUP_ENTRY
+    return False
 
 
 def get_user_by_email(email):
@@ -331,13 +610,15 @@ def get_user_by_email(email):
     """
     conn = get_db_connection()
     db_type = g.get('db_type', 'sqlite')
+    # Matched against the lower(email) index on every backend
+    email_lc = email.lower()
 
     try:
         if db_type == 'postgres':
             with conn.cursor() as cur:
                 cur.execute(
                     "SELECT id, email, password_hash, mobile, registered_at, COALESCE(is_premium, FALSE) AS is_premium, allowed_tools FROM users WHERE LOWER(email) = %s",
-                    (email.lower(),)
+                    (email_lc,)
                 )
                 row = cur.fetchone()
                 if not row:
@@ -355,7 +636,7 @@ def get_user_by_email(email):
             with conn.cursor() as cur:
                 cur.execute(
                     "SELECT id, email, password_hash, mobile, registered_at, IFNULL(is_premium, 0) AS is_premium, allowed_tools FROM users WHERE LOWER(email) = %s",
-                    (email.lower(),)
+                    (email_lc,)
                 )
                 row = cur.fetchone()
                 if not row:
@@ -374,7 +655,7 @@ def get_user_by_email(email):
         else:  # sqlite
             cursor = conn.execute(
                 "SELECT id, email, password_hash, mobile, registered_at, IFNULL(is_premium, 0) AS is_premium, allowed_tools FROM users WHERE LOWER(email) = ?",
-                (email.lower(),)
+                (email_lc,)
             )
             row = cursor.fetchone()
             if row:
@@ -433,6 +714,66 @@ def get_user_by_id(user_id):
         return None
 
 
+def get_user_full_by_id(user_id):
+    """
+    Get a user by ID including the password hash, in one query.
+    Keys: id, email, password_hash, mobile, registered_at, is_premium, allowed_tools
+    """
+    conn = get_db_connection()
+    db_type = g.get('db_type', 'sqlite')
+
+    try:
+        if db_type == 'postgres':
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, email, password_hash, mobile, registered_at, COALESCE(is_premium, FALSE) AS is_premium, allowed_tools FROM users WHERE id = %s",
+                    (user_id,)
+                )
+                row = cur.fetchone()
+                if not row:
+                    return None
+                return {
+                    'id': row[0],
+                    'email': row[1],
+                    'password_hash': row[2],
+                    'mobile': row[3],
+                    'registered_at': str(row[4]) if len(row) > 4 else None,
+                    'is_premium': bool(row[5]) if len(row) > 5 else False,
+                    'allowed_tools': row[6] if len(row) > 6 else None,
+                }
+        elif db_type == 'mysql':
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, email, password_hash, mobile, registered_at, IFNULL(is_premium, 0) AS is_premium, allowed_tools FROM users WHERE id = %s",
+                    (user_id,)
+                )
+                row = cur.fetchone()
+                if not row:
+                    return None
+                if isinstance(row, dict):
+                    return row
+                return {
+                    'id': row[0],
+                    'email': row[1],
+                    'password_hash': row[2],
+                    'mobile': row[3],
+                    'registered_at': str(row[4]) if len(row) > 4 else None,
+                    'is_premium': bool(row[5]) if len(row) > 5 else False,
+                    'allowed_tools': row[6] if len(row) > 6 else None,
+                }
+        else:  # sqlite
+            cursor = conn.execute(
+                "SELECT id, email, password_hash, mobile, registered_at, IFNULL(is_premium, 0) AS is_premium, allowed_tools FROM users WHERE id = ?",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
+    except Exception:
+        return None
+
+
 def update_user_entitlements(user_id, is_premium=None, allowed_tools=None):
     """
     Update a user's entitlements. Pass is_premium (bool) and/or allowed_tools (list or comma/JSON string).
@@ -442,7 +783,6 @@ def update_user_entitlements(user_id, is_premium=None, allowed_tools=None):
     db_type = g.get('db_type', 'sqlite')
 
     # Normalize allowed_tools to string (JSON)
-    import json
     tools_str = None
     if allowed_tools is not None:
         if isinstance(allowed_tools, str):
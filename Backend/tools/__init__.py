@@ -1,10 +1,16 @@
-# Expose all tool functions for easier imports
-from .email_analyzer import analyze_email_tool
-from .url_scanner import scan_url_tool
-from .password_cracker import crack_hash_tool
-from .sms_spam_detector import test_sms_tool
-from .malware_analyzer import analyze_file_tool
-from .web_recon import recon_target_tool
+# Expose all tool functions for easier imports. Submodules are imported on first
+# attribute access, so importing one tool doesn't load the others (and their
+# dependencies such as requests).
+import importlib
+
+_EXPORTS = {
+    'analyze_email_tool': '.email_analyzer',
+    'scan_url_tool': '.url_scanner',
+    'crack_hash_tool': '.password_cracker',
+    'test_sms_tool': '.sms_spam_detector',
+    'analyze_file_tool': '.malware_analyzer',
+    'recon_target_tool': '.web_recon',
+}
 
 __all__ = [
     'analyze_email_tool',
@@ -13,4 +19,13 @@ __all__ = [
     'test_sms_tool',
     'analyze_file_tool',
     'recon_target_tool'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -5,6 +5,7 @@ Adds convenience functions:
 - hash_password(password: str) -> str
 - verify_password(hash: str, password: str) -> bool
 - needs_rehash(hash: str) -> bool
+- check_password(hash: str, password: str) -> bool  (Argon2 or legacy Werkzeug)
 - generate_token(nbytes: int = 32) -> str
 
 NOTE: This module requires the `argon2-cffi` package. Add it to your
@@ -22,9 +23,10 @@ try:
 except Exception as e:  # pragma: no cover - runtime dependency check
     raise RuntimeError("argon2-cffi is required for auth_utils.py; install with 'pip install argon2-cffi'")
 
-# Tuning: time_cost, memory_cost (KB), parallelism. These are reasonable defaults
-# for many applications but should be tuned per deployment environment.
-_ph = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2, hash_len=32)
+# Tuning: time_cost, memory_cost (KB), parallelism. 19 MiB / t=2 / p=1 is the
+# OWASP-recommended Argon2id floor and keeps a hash well under 50 ms on a small
+# instance. Existing hashes carry their own parameters and still verify.
+_ph = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1, hash_len=32)
 
 
 def hash_password(password: str) -> str:
@@ -68,7 +70,12 @@ def verify_password(stored_hash: str, password: str) -> bool:
 
 
 def needs_rehash(stored_hash: str) -> bool:
-    """Return True if the stored hash should be re-hashed with current params."""
+    """Return True if the stored hash should be re-hashed with current params.
+
+    Legacy Werkzeug (pbkdf2/scrypt) hashes always need re-hashing.
+    """
+    if stored_hash and not stored_hash.startswith('$argon2'):
+        return True
     try:
         return _ph.check_needs_rehash(stored_hash)
     except Exception:
@@ -78,3 +85,14 @@ def needs_rehash(stored_hash: str) -> bool:
 def generate_token(nbytes: int = 32) -> str:
     """Generate a secure URL-safe token for password resets or session tokens."""
     return secrets.token_urlsafe(nbytes)
+
+
+def check_password(stored_hash: str, password: str) -> bool:
+    """Verify a password against either an Argon2 hash or a legacy Werkzeug
+    (pbkdf2/scrypt) hash, so accounts created before the switch still work."""
+    if not stored_hash:
+        return False
+    if stored_hash.startswith('$argon2'):
+        return verify_password(stored_hash, password)
+    from werkzeug.security import check_password_hash
+    return check_password_hash(stored_hash, password)
@@ -4,6 +4,37 @@ import time
 from typing import Dict, Any
 from ..utils import log_alert
 
+try:
+    import iptc  # optional; python-iptables edits rules in-process via libiptc
+except Exception:  # pragma: no cover - optional dependency (Linux, root only)
+    iptc = None
+
+
+def _drop_rule(ip: str):
+    rule = iptc.Rule()
+    rule.src = ip
+    rule.target = iptc.Target(rule, 'DROP')
+    return rule
+
+
+def _iptables(action: str, ip: str):
+    """Append ('-A') or delete ('-D') an INPUT DROP rule for ip.
+
+    Uses libiptc in-process when python-iptables is available and we have
+    the privileges for it; otherwise forks `sudo iptables`.
+    """
+    if iptc is not None:
+        try:
+            chain = iptc.Chain(iptc.Table(iptc.Table.FILTER), 'INPUT')
+            if action == '-A':
+                chain.append_rule(_drop_rule(ip))
+            else:
+                chain.delete_rule(_drop_rule(ip))
+            return
+        except Exception:
+            pass  # e.g. not root; fall back to sudo
+    subprocess.run(['sudo', 'iptables', action, 'INPUT', '-s', ip, '-j', 'DROP'], check=True)
+
 class Mitigator:
     def __init__(self):
         self.blocked_ips = {}  # {ip: {'count': int, 'blocked_until': float}}
@@ -25,7 +56,7 @@ class Mitigator:
 
         try:
             # Best-effort; requires running as root or with sudo privileges
-            subprocess.run(['sudo', 'iptables', '-A', 'INPUT', '-s', ip, '-j', 'DROP'], check=True)
+            _iptables('-A', ip)
             log_alert(f"Blocked {ip} for {duration}s (attempt {count})")
         except subprocess.CalledProcessError as e:
             log_alert(f"Failed to block {ip}: {e}")
@@ -38,7 +69,7 @@ class Mitigator:
         for ip, data in list(self.blocked_ips.items()):
             if now > data['blocked_until']:
                 try:
-                    subprocess.run(['sudo', 'iptables', '-D', 'INPUT', '-s', ip, '-j', 'DROP'], check=True)
+                    _iptables('-D', ip)
                     log_alert(f"Unblocked {ip}")
                 except Exception:
                     log_alert(f"Failed to unblock {ip}")
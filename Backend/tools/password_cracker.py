@@ -1,5 +1,6 @@
 import hashlib
 import itertools
+from concurrent.futures import ThreadPoolExecutor
 from flask import request
 import threading
 import time
@@ -8,6 +9,14 @@ import time
 found_password = None
 is_running = False
 
+# Cracking jobs run on a single reusable worker so a burst of requests can't
+# spawn an unbounded number of CPU-bound threads. At most _MAX_PENDING jobs
+# may be queued or running at once.
+_crack_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='crack')
+_MAX_PENDING = 4
+_pending = []
+_pending_lock = threading.Lock()
+
 def crack_hash_tool(flask_request):
     """
     Crack 6-digit numeric hashes using brute force
@@ -20,13 +29,17 @@ def crack_hash_tool(flask_request):
     if not hash_value:
         return {'error': 'Hash value required'}
     
-    # Reset state
-    found_password = None
-    is_running = False
-    
-    # Start cracking in background thread
-    thread = threading.Thread(target=crack_password, args=(hash_value, algorithm))
-    thread.start()
+    with _pending_lock:
+        _pending[:] = [f for f in _pending if not f.done()]
+        if len(_pending) >= _MAX_PENDING:
+            return {'error': 'Cracker is busy, try again shortly'}
+
+        # Reset state
+        found_password = None
+        is_running = False
+
+        # Queue the job on the cracking worker
+        _pending.append(_crack_pool.submit(crack_password, hash_value, algorithm))
     
     return {'status': 'started', 'message': 'Cracking process initiated'}
 
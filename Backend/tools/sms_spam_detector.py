@@ -1,6 +1,16 @@
 import re
 from flask import request
 
+# Common spam patterns, compiled once at import instead of on every request
+_SPAM_PATTERNS = [
+    (re.compile(r'\b\d{4,}\b'), 'Long number sequences'),
+    (re.compile(r'(free|win|won|cash|prize)'), 'Prize-related keywords'),
+    (re.compile(r'\$\$'), 'Multiple dollar signs'),
+    (re.compile(r'[!]{3,}'), 'Multiple exclamation marks'),
+    (re.compile(r'\b(click|call|text)\s+now\b'), 'Urgent action requests'),
+    (re.compile(r'\b(hurry|limited|offer)\b'), 'Scarcity tactics')
+]
+
 def test_sms_tool(flask_request):
     """
     Analyze SMS content for spam indicators
@@ -12,21 +22,12 @@ def test_sms_tool(flask_request):
     if not message:
         return {'error': 'Message content required'}
     
-    # Common spam patterns
-    spam_patterns = [
-        (r'\b\d{4,}\b', 'Long number sequences'),
-        (r'(free|win|won|cash|prize)', 'Prize-related keywords'),
-        (r'\$\$', 'Multiple dollar signs'),
-        (r'[!]{3,}', 'Multiple exclamation marks'),
-        (r'\b(click|call|text)\s+now\b', 'Urgent action requests'),
-        (r'\b(hurry|limited|offer)\b', 'Scarcity tactics')
-    ]
-    
     spam_indicators = []
     spam_score = 0
     
-    for pattern, description in spam_patterns:
-        matches = re.findall(pattern, message.lower())
+    lowered = message.lower()
+    for pattern, description in _SPAM_PATTERNS:
+        matches = pattern.findall(lowered)
         if matches:
             spam_indicators.append({
                 'pattern': description,
@@ -14,10 +14,14 @@ def scan_url_tool(flask_request):
     
     if not url.startswith(('http://', 'https://')):
         url = 'http://' + url
+    domain = urlparse(url).netloc
+    if not domain:
+        # e.g. a bare 'http://'; nothing to fetch
+        return {'error': 'URL must include a host'}
     
     results = {
         'url': url,
-        'domain': urlparse(url).netloc,
+        'domain': domain,
         'accessible': False,
         'redirects': False,
         'security_headers': {}
@@ -1,9 +1,49 @@
 import socket
 import ssl
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from flask import request
 
+# The DNS, TLS and HTTP probes are independent network waits, so each recon
+# runs them side by side on a shared bounded pool
+_probe_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='recon')
+
+
+def _probe_ip(domain):
+    try:
+        return {'ip_address': socket.gethostbyname(domain)}
+    except Exception as e:
+        return {'ip_error': str(e)}
+
+
+def _probe_ssl(domain):
+    try:
+        context = ssl.create_default_context()
+        with socket.create_connection((domain, 443), timeout=5) as sock:
+            with context.wrap_socket(sock, server_hostname=domain) as ssock:
+                cert = ssock.getpeercert()
+                return {'ssl_info': {
+                    'subject': dict(x[0] for x in cert['subject']),
+                    'issuer': dict(x[0] for x in cert['issuer']),
+                    'not_after': cert['notAfter']
+                }}
+    except Exception as e:
+        return {'ssl_error': str(e)}
+
+
+def _probe_headers(full_url):
+    try:
+        response = requests.head(full_url, timeout=5)
+        return {'server_headers': dict(response.headers)}
+    except:
+        try:
+            response = requests.get(full_url, timeout=5)
+            return {'server_headers': dict(response.headers)}
+        except Exception as e:
+            return {'headers_error': str(e)}
+
+
 def recon_target_tool(flask_request):
     """
     Perform basic web reconnaissance on a target
@@ -16,6 +56,9 @@ def recon_target_tool(flask_request):
     
     # Parse URL
     parsed = urlparse(target_url)
+    if parsed.scheme in ('http', 'https') and not parsed.netloc:
+        # e.g. a bare 'https://'; nothing to probe
+        return {'error': 'URL must include a host'}
     domain = parsed.netloc.replace('www.', '') if parsed.netloc else target_url.replace('www.', '')
     protocol = parsed.scheme or 'http'
     full_url = f"{protocol}://{domain}" if not parsed.scheme else target_url
@@ -29,37 +72,11 @@ def recon_target_tool(flask_request):
         'server_headers': None
     }
     
-    # Get IP address
-    try:
-        ip = socket.gethostbyname(domain)
-        results['ip_address'] = ip
-    except Exception as e:
-        results['ip_error'] = str(e)
-    
-    # Get SSL information if HTTPS
+    probes = [_probe_pool.submit(_probe_ip, domain)]
     if protocol == 'https':
-        try:
-            context = ssl.create_default_context()
-            with socket.create_connection((domain, 443), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-                    results['ssl_info'] = {
-                        'subject': dict(x[0] for x in cert['subject']),
-                        'issuer': dict(x[0] for x in cert['issuer']),
-                        'not_after': cert['notAfter']
-                    }
-        except Exception as e:
-            results['ssl_error'] = str(e)
-    
-    # Get server headers
-    try:
-        response = requests.head(full_url, timeout=5)
-        results['server_headers'] = dict(response.headers)
-    except:
-        try:
-            response = requests.get(full_url, timeout=5)
-            results['server_headers'] = dict(response.headers)
-        except Exception as e:
-            results['headers_error'] = str(e)
+        probes.append(_probe_pool.submit(_probe_ssl, domain))
+    probes.append(_probe_pool.submit(_probe_headers, full_url))
+    for probe in probes:
+        results.update(probe.result())
     
     return results
\ No newline at end of file
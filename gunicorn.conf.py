@@ -0,0 +1,33 @@
+"""Gunicorn settings for production (used by render.yaml).
+
+    gunicorn -c gunicorn.conf.py run:app
+
+Gunicorn also picks this file up on its own when started from the project
+root, so a bare `gunicorn run:app` gets the same settings.
+
+Threaded workers let one process overlap slow tool calls (network recon, URL
+scans) with other requests, and preloading builds the app once in the master
+so workers share its pages copy-on-write.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = 'gthread'
+# One worker per core, capped: containers often report the host's core count,
+# and each worker holds its own copy of the tool modules once they load
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+# Max simultaneous client connections per worker (gthread keeps idle
+# keep-alive connections open without holding a thread)
+worker_connections = 1000
+
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Threads don't survive fork: the tool-log writer started while the app
+    # was preloaded in the master has to be started again in each worker
+    from Backend.database import start_log_writer
+    start_log_writer()
@@ -0,0 +1,62 @@
+"""
+Tests for Backend.db_adapter against a throwaway SQLite database.
+Run from the project root with: python -m unittest discover tests
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+from flask import Flask
+
+from Backend import db_adapter
+
+
+class InsertUsersBulkTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._saved = (db_adapter.DB_DIR, db_adapter.DB_PATH,
+                       db_adapter._BACKEND, db_adapter._sqlite_local)
+        db_adapter.DB_DIR = self._tmp.name
+        db_adapter.DB_PATH = os.path.join(self._tmp.name, 'app.db')
+        db_adapter._BACKEND = 'sqlite'
+        db_adapter._sqlite_local = threading.local()
+
+        self.app = Flask(__name__)
+        db_adapter._init_sqlite_tables(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+        conn = getattr(db_adapter._sqlite_local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        (db_adapter.DB_DIR, db_adapter.DB_PATH,
+         db_adapter._BACKEND, db_adapter._sqlite_local) = self._saved
+        self._tmp.cleanup()
+
+    def _emails(self):
+        rows = db_adapter.get_db_connection().execute(
+            "SELECT email FROM users ORDER BY id").fetchall()
+        return [r['email'] for r in rows]
+
+    def test_inserts_every_row(self):
+        rows = [(f'user{i}@example.com', None, 'hash') for i in range(3)]
+        self.assertEqual(db_adapter.insert_users_bulk(rows), 3)
+        self.assertEqual(self._emails(), [r[0] for r in rows])
+
+    def test_empty_batch_is_a_no_op(self):
+        self.assertEqual(db_adapter.insert_users_bulk([]), 0)
+        self.assertEqual(self._emails(), [])
+
+    def test_duplicate_rolls_back_whole_batch(self):
+        db_adapter.insert_users_bulk([('taken@example.com', None, 'hash')])
+        rows = [('new@example.com', None, 'hash'), ('Taken@example.com', None, 'hash')]
+        with self.assertRaises(ValueError):
+            db_adapter.insert_users_bulk(rows)
+        self.assertEqual(self._emails(), ['taken@example.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()